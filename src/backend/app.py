@@ -71,9 +71,7 @@ def index():
 @app.route('/api/state')
 def get_state():
     state = robot_service.get_state()
-    state['robot_id'] = ROBOT_ID
-    state['robot_name'] = ROBOT_NAME
-    return jsonify(state)
+    return jsonify({**state, 'robot_id': ROBOT_ID, 'robot_name': ROBOT_NAME})
 
 @app.route('/api/robot_info')
 def get_robot_info():
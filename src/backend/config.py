@@ -13,6 +13,18 @@ MEDIAMTX_EXTERNAL = os.getenv("MEDIAMTX_EXTERNAL", "localhost:8554")
 # Relay service (Jetson-side ffmpeg relay, empty = use local RelayManager)
 RELAY_SERVICE_URL = os.getenv("RELAY_SERVICE_URL", "")
 
+# Log ffmpeg stderr from local relays (false = discard it, no reader thread)
+RELAY_LOG_FFMPEG = os.getenv("RELAY_LOG_FFMPEG", "true").lower() in ("true", "1", "yes")
+
+# Use the Jetson hardware encoder (h264_nvmpi) for local robot camera relays.
+# Off by default like the relay service's USE_NVENC: stock ffmpeg builds lack
+# h264_nvmpi (relay_manager falls back to libx264 if it is missing).
+RELAY_USE_NVENC = os.getenv("RELAY_USE_NVENC", "false").lower() in ("true", "1", "yes")
+
+# Publish robot camera JPEGs as MJPEG over RTSP without re-encoding.
+# Off by default: VILA JPS expects H264 Baseline on the relay paths.
+RELAY_MJPEG_PASSTHROUGH = os.getenv("RELAY_MJPEG_PASSTHROUGH", "false").lower() in ("true", "1", "yes")
+
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
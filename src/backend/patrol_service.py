@@ -8,13 +8,12 @@ import time
 import os
 import uuid
 import io
-from datetime import datetime
 from PIL import Image
 
 from config import ROBOT_ID, ROBOT_NAME, ROBOT_IMAGES_DIR, ROBOT_DATA_DIR, POINTS_FILE, SCHEDULE_FILE
 import settings_service
 import requests
-from utils import load_json, save_json, get_current_time_str, get_filename_timestamp
+from utils import load_json, save_json, get_current_time_str, get_current_datetime, get_filename_timestamp
 from database import get_db_connection, db_context, update_run_tokens
 from robot_service import robot_service
 from ai_service import ai_service, parse_ai_response
@@ -102,15 +101,7 @@ class PatrolService:
 
         while True:
             try:
-                settings = settings_service.get_all()
-                tz_name = settings.get("timezone", "UTC")
-
-                try:
-                    from zoneinfo import ZoneInfo
-                    now = datetime.now(ZoneInfo(tz_name))
-                except Exception:
-                    now = datetime.now()
-
+                now = get_current_datetime()
                 current_time_str = now.strftime("%H:%M")
                 current_day = now.weekday()
                 current_date = now.strftime("%Y-%m-%d")
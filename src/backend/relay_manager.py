@@ -10,6 +10,9 @@ service via RelayServiceClient. Otherwise, the local RelayManager is used.
 """
 
 import atexit
+import os
+import select
+import shutil
 import signal
 import socket
 import subprocess
@@ -17,22 +20,107 @@ import threading
 import time
 from urllib.parse import urlparse
 
+import orjson
 import requests as http_requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from config import RELAY_SERVICE_URL
+from config import RELAY_SERVICE_URL, RELAY_LOG_FFMPEG, RELAY_USE_NVENC, RELAY_MJPEG_PASSTHROUGH
 from logger import get_logger
 
 logger = get_logger("relay_manager", "relay_manager.log")
 
 MAX_RETRIES = 3
 MONITOR_INTERVAL = 10
+RESTART_MIN_INTERVAL = 1.0  # min seconds between restarts of the same relay
 FEEDER_INTERVAL = 2.0  # 0.5 fps (1 frame per 2s)
 
+# --- ffmpeg argv templates (fixed apart from the URLs, built once) ---
+
+# Absolute path lets subprocess use posix_spawn (it requires a path with a directory)
+_FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+
+_SCALE_720P = "scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2"
+
+
+def _has_encoder(name):
+    """True if this ffmpeg build lists the named encoder in `ffmpeg -encoders`."""
+    try:
+        out = subprocess.run(
+            [_FFMPEG, "-hide_banner", "-encoders"],
+            stdin=subprocess.DEVNULL, capture_output=True, timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return f" {name} ".encode() in out
+
+
+_USE_NVENC = RELAY_USE_NVENC and _has_encoder("h264_nvmpi")
+if RELAY_USE_NVENC and not _USE_NVENC:
+    logger.warning("RELAY_USE_NVENC is set but ffmpeg has no h264_nvmpi encoder, using libx264")
+
+if RELAY_MJPEG_PASSTHROUGH:
+    # Robot frames are already JPEG: publish them as MJPEG without re-encoding
+    _ROBOT_DEMUXER = "mjpeg"
+    _ROBOT_VIDEO_ARGS = ("-c:v", "copy")
+elif _USE_NVENC:
+    # Jetson hardware encoder, with the same stream shape as the libx264
+    # branch (Baseline, every frame a keyframe, SPS/PPS on each) for NvMMLite/VILA
+    _ROBOT_DEMUXER = "image2pipe"
+    _ROBOT_VIDEO_ARGS = (
+        "-vf", _SCALE_720P,
+        "-c:v", "h264_nvmpi",
+        "-b:v", "2M",
+        "-profile:v", "baseline",
+        "-g", "1",
+        "-pix_fmt", "yuv420p",
+        "-bsf:v", "dump_extra",
+    )
+else:
+    _ROBOT_DEMUXER = "image2pipe"
+    _ROBOT_VIDEO_ARGS = (
+        "-vf", _SCALE_720P,
+        "-c:v", "libx264",
+        "-preset", "ultrafast",
+        "-tune", "zerolatency",
+        "-profile:v", "baseline",
+        "-level", "3.1",
+        "-pix_fmt", "yuv420p",
+        "-x264-params", "keyint=1:min-keyint=1:repeat-headers=1",
+        "-bsf:v", "dump_extra",
+    )
+
+# Robot camera: JPEG frames on stdin -> RTSP (append rtsp_url)
+_ROBOT_CMD_PREFIX = (
+    _FFMPEG, "-y", "-hide_banner", "-nostats",
+    "-f", _ROBOT_DEMUXER,
+    "-framerate", "1/2",
+    "-i", "pipe:0",
+    *_ROBOT_VIDEO_ARGS,
+    "-f", "rtsp",
+    "-rtsp_transport", "tcp",
+)
+
+# External RTSP copy: _EXT_CMD_INPUT + source_url + _EXT_CMD_OUTPUT + rtsp_url
+_EXT_CMD_INPUT = (
+    _FFMPEG, "-y", "-hide_banner", "-nostats", "-nostdin",
+    "-rtsp_transport", "tcp",
+    "-i",
+)
+_EXT_CMD_OUTPUT = (
+    "-c:v", "copy",
+    "-an",
+    "-f", "rtsp",
+    "-rtsp_transport", "tcp",
+)
+
 
 def wait_for_stream(rtsp_url, max_wait=20):
     """Poll an RTSP URL via lightweight DESCRIBE until the stream exists on mediamtx.
 
     Uses raw TCP socket (fast, non-blocking) instead of OpenCV (blocks for seconds on 404).
+    A single connection is kept open across attempts (RTSP allows several requests per
+    connection, distinguished by CSeq) and the retry delay backs off 50ms → 1s.
     Returns True if stream became available within max_wait seconds, False otherwise.
     """
     parsed = urlparse(rtsp_url)
@@ -40,38 +128,112 @@ def wait_for_stream(rtsp_url, max_wait=20):
     port = parsed.port or 8554
     path = parsed.path or "/"
 
-    deadline = time.time() + max_wait
+    start = time.time()
+    deadline = start + max_wait
     attempt = 0
-
-    while time.time() < deadline:
-        attempt += 1
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(3)
-            s.connect((host, port))
-            describe = (
-                f"DESCRIBE rtsp://{host}:{port}{path} RTSP/1.0\r\n"
-                f"CSeq: 1\r\n"
-                f"\r\n"
-            )
-            s.sendall(describe.encode())
-            resp = s.recv(1024).decode(errors="ignore")
+    backoff = 0.05
+    addr = None  # resolved once, reused for every reconnect
+    s = None
+    # Encoded once; only the CSeq number is filled in per attempt
+    describe = (
+        f"DESCRIBE rtsp://{host}:{port}{path.replace('%', '%%')} RTSP/1.0\r\n"
+        f"CSeq: %d\r\n"
+        f"\r\n"
+    ).encode()
+
+    try:
+        while time.time() < deadline:
+            attempt += 1
+            try:
+                if addr is None:
+                    addr = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][4]
+                if s is None:
+                    s = socket.create_connection(addr, timeout=3)
+                    # Don't let Nagle hold back the small DESCRIBE request
+                    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                s.sendall(describe % attempt)
+                resp = s.recv(1024).decode(errors="ignore")
+
+                if "RTSP/1.0 200" in resp:
+                    logger.info(f"Stream ready after {attempt} attempts ({time.time() - start:.1f}s): {rtsp_url}")
+                    return True
+                if not resp:
+                    # Server closed the connection; reopen on next attempt
+                    s.close()
+                    s = None
+                    logger.debug(f"Stream not ready (attempt {attempt}): no response")
+                else:
+                    status = resp.split("\r\n")[0]
+                    logger.debug(f"Stream not ready (attempt {attempt}): {status}")
+            except Exception as e:
+                logger.debug(f"Stream check error (attempt {attempt}): {e}")
+                if s is not None:
+                    s.close()
+                    s = None
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 1.0)
+    finally:
+        if s is not None:
             s.close()
 
-            if "RTSP/1.0 200" in resp:
-                logger.info(f"Stream ready after {attempt} attempts ({time.time() - deadline + max_wait:.1f}s): {rtsp_url}")
-                return True
-            else:
-                status = resp.split("\r\n")[0] if resp else "no response"
-                logger.debug(f"Stream not ready (attempt {attempt}): {status}")
-        except Exception as e:
-            logger.debug(f"Stream check error (attempt {attempt}): {e}")
-        time.sleep(1)
-
     logger.warning(f"Stream not ready after {max_wait}s ({attempt} attempts): {rtsp_url}")
     return False
 
 
+class _StopPipe(threading.Event):
+    """threading.Event that can also be passed to select(): readable once set."""
+
+    def __init__(self):
+        super().__init__()
+        self._fd_lock = threading.Lock()
+        self._r, self._w = os.pipe()
+
+    def fileno(self):
+        return self._r
+
+    def set(self):
+        super().set()
+        # Closing the write end makes the read end permanently readable (EOF)
+        with self._fd_lock:
+            if self._w is not None:
+                os.close(self._w)
+                self._w = None
+
+    def close(self):
+        """Release both pipe fds (called by the owning feeder when it exits)."""
+        with self._fd_lock:
+            for fd in (self._r, self._w):
+                if fd is not None:
+                    os.close(fd)
+            self._r = self._w = None
+
+
+def _writev_all(fd, views, stop_pipe):
+    """Write a list of buffers to a non-blocking fd with os.writev (no join/copy).
+
+    Handles partial writes; on EAGAIN blocks in select() until the fd is
+    writable or stop_pipe is set. Returns False if stopped before everything
+    was written.
+    """
+    views = [memoryview(v).cast("B") for v in views]
+    while views:
+        try:
+            written = os.writev(fd, views)
+        except BlockingIOError:
+            readable, _, _ = select.select([stop_pipe], [fd], [])
+            if readable:
+                return False
+            continue
+        while written and views:
+            if written >= len(views[0]):
+                written -= len(views[0])
+                views.pop(0)
+            else:
+                views[0] = views[0][written:]
+                written = 0
+    return True
+
+
 # === Relay Service Client (HTTP client for Jetson-side relay service) ===
 
 
@@ -81,8 +243,19 @@ class RelayServiceClient:
     def __init__(self, base_url):
         self._base_url = base_url.rstrip("/")
         self._session = http_requests.Session()
-        self._feeders = {}  # key -> FrameFeederThread
-        self._lock = threading.Lock()
+        # Pool keep-alive connections to the (fixed) relay service host so
+        # frame POSTs and control calls never pay a fresh TCP handshake.
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=64, pool_block=False,
+            max_retries=Retry(total=0, connect=0, read=0),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({
+            "Connection": "keep-alive",
+            "User-Agent": "sigma-relay/1",
+        })
+        self._feeder = FrameFeeder(self)
 
     def is_available(self):
         """Check if the relay service is reachable."""
@@ -99,8 +272,9 @@ class RelayServiceClient:
             body["source_url"] = source_url
         try:
             resp = self._session.post(
-                f"{self._base_url}/relays", json=body, timeout=10)
-            data = resp.json()
+                f"{self._base_url}/relays", data=orjson.dumps(body),
+                headers={"Content-Type": "application/json"}, timeout=10)
+            data = orjson.loads(resp.content)
             if resp.status_code == 200:
                 return data.get("rtsp_path"), None
             return None, data.get("error", f"HTTP {resp.status_code}")
@@ -136,7 +310,7 @@ class RelayServiceClient:
                 timeout=timeout + 5,
             )
             if resp.status_code == 200:
-                return resp.json().get("ready", False)
+                return orjson.loads(resp.content).get("ready", False)
             return False
         except Exception as e:
             logger.warning(f"RelayServiceClient: wait_for_stream({key}) error: {e}")
@@ -151,74 +325,94 @@ class RelayServiceClient:
             logger.warning(f"RelayServiceClient: stop_all error: {e}")
 
     def start_frame_feeder(self, key, frame_func):
-        """Start a FrameFeederThread that grabs gRPC frames and POSTs them."""
-        with self._lock:
-            if key in self._feeders:
-                return
-            feeder = FrameFeederThread(key, frame_func, self)
-            feeder.start()
-            self._feeders[key] = feeder
+        """Start feeding gRPC frames for key to the relay service."""
+        if self._feeder.add(key, frame_func):
             logger.info(f"Started frame feeder for {key}")
 
     def stop_frame_feeder(self, key):
-        """Stop a specific frame feeder thread."""
-        with self._lock:
-            feeder = self._feeders.pop(key, None)
-        if feeder:
-            feeder.stop()
+        """Stop feeding frames for a specific relay."""
+        if self._feeder.remove(key):
             logger.info(f"Stopped frame feeder for {key}")
 
     def stop_all_feeders(self):
-        """Stop all frame feeder threads."""
-        with self._lock:
-            feeders = list(self._feeders.values())
-            self._feeders.clear()
-        for feeder in feeders:
-            feeder.stop()
+        """Stop feeding frames for all relays."""
+        self._feeder.clear()
 
 
-class FrameFeederThread:
-    """Grabs gRPC frames and POSTs them to the relay service at ~0.5fps."""
+class FrameFeeder:
+    """Grabs gRPC frames and POSTs them to the relay service at ~0.5fps.
 
-    def __init__(self, key, frame_func, client):
-        self._key = key
-        self._frame_func = frame_func
+    A single daemon thread serves every active relay key, scheduling each
+    key's next grab FEEDER_INTERVAL after its previous one. The thread exits
+    when the last key is removed and is restarted on the next add().
+    """
+
+    def __init__(self, client):
         self._client = client
-        self._stop_event = threading.Event()
+        self._feeds = {}  # key -> [next_due (monotonic), frame_func]
+        self._cond = threading.Condition()
         self._thread = None
 
-    def start(self):
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
-
-    def stop(self):
-        self._stop_event.set()
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=3)
+    def add(self, key, frame_func):
+        """Register a key. Returns False if it was already being fed."""
+        with self._cond:
+            if key in self._feeds:
+                return False
+            self._feeds[key] = [time.monotonic(), frame_func]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def remove(self, key):
+        """Unregister a key. Returns False if it was not being fed."""
+        with self._cond:
+            removed = self._feeds.pop(key, None) is not None
+            self._cond.notify()
+        return removed
+
+    def clear(self):
+        with self._cond:
+            self._feeds.clear()
+            self._cond.notify()
 
     def _run(self):
-        while not self._stop_event.is_set():
+        while True:
+            with self._cond:
+                while True:
+                    if not self._feeds:
+                        self._thread = None
+                        return
+                    key, feed = min(self._feeds.items(), key=lambda item: item[1][0])
+                    wait = feed[0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                frame_func = feed[1]
+                feed[0] = time.monotonic() + FEEDER_INTERVAL
+
             try:
-                img = self._frame_func()
+                img = frame_func()
                 if img and img.data:
-                    self._client.feed_frame(self._key, img.data)
+                    self._client.feed_frame(key, img.data)
             except Exception as e:
-                logger.debug(f"FrameFeeder error for {self._key}: {e}")
-            self._stop_event.wait(FEEDER_INTERVAL)
+                logger.debug(f"FrameFeeder error for {key}: {e}")
 
 
 # === Local Relay Manager (fallback when relay service not available) ===
 
 
 class _RelayEntry:
-    __slots__ = ("key", "relay_type", "process", "feeder_thread", "stop_event",
+    __slots__ = ("key", "relay_type", "process", "cmd", "feeder_thread", "stop_event",
                  "started_at", "restart_count", "frame_func")
 
-    def __init__(self, key, relay_type, process, feeder_thread=None,
+    def __init__(self, key, relay_type, process, cmd, feeder_thread=None,
                  stop_event=None, frame_func=None):
         self.key = key
         self.relay_type = relay_type
         self.process = process
+        self.cmd = cmd
         self.feeder_thread = feeder_thread
         self.stop_event = stop_event or threading.Event()
         self.frame_func = frame_func
@@ -231,7 +425,14 @@ class RelayManager:
 
     def __init__(self):
         self._relays = {}  # key -> _RelayEntry
+        self._pids = {}  # pid -> _RelayEntry (live ffmpeg processes)
+        self._last_restart_at = {}  # key -> monotonic time of last restart
         self._lock = threading.Lock()
+        # Self-pipe woken by SIGCHLD so the monitor reacts to child exit immediately
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_w, False)
+        self._prev_sigchld = None
+        self._install_sigchld_handler()
         self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self._monitor_thread.start()
         atexit.register(self.stop_all)
@@ -256,34 +457,13 @@ class RelayManager:
                 logger.info(f"Robot camera relay already running: {key}")
                 return rtsp_path
 
-        cmd = [
-            "ffmpeg", "-y",
-            "-f", "image2pipe",
-            "-framerate", "1/2",
-            "-i", "pipe:0",
-            "-vf", "scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2",
-            "-c:v", "libx264",
-            "-preset", "ultrafast",
-            "-tune", "zerolatency",
-            "-profile:v", "baseline",
-            "-level", "3.1",
-            "-pix_fmt", "yuv420p",
-            "-x264-params", "keyint=1:min-keyint=1:repeat-headers=1",
-            "-bsf:v", "dump_extra",
-            "-f", "rtsp",
-            "-rtsp_transport", "tcp",
-            rtsp_url,
-        ]
-
-        logger.info(f"Starting robot camera relay: {key} -> {rtsp_url}")
-        proc = subprocess.Popen(
-            cmd, stdin=subprocess.PIPE,
-            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
-            text=True, bufsize=1,
-        )
-        threading.Thread(target=self._stderr_reader, args=(proc, key), daemon=True).start()
+        cmd = [*_ROBOT_CMD_PREFIX, rtsp_url]
 
-        stop_event = threading.Event()
+        logger.info(f"Starting robot camera relay: {key} -> {rtsp_url} "
+                    f"(nvenc={_USE_NVENC}, mjpeg={RELAY_MJPEG_PASSTHROUGH})")
+        proc = self._spawn_ffmpeg(cmd, subprocess.PIPE, key)
+
+        stop_event = _StopPipe()
         feeder = threading.Thread(
             target=self._feeder_loop,
             args=(proc, frame_func, stop_event, key),
@@ -291,12 +471,11 @@ class RelayManager:
         )
         feeder.start()
 
-        entry = _RelayEntry(key, "robot_camera", proc,
+        entry = _RelayEntry(key, "robot_camera", proc, cmd,
                             feeder_thread=feeder, stop_event=stop_event,
                             frame_func=frame_func)
 
-        with self._lock:
-            self._relays[key] = entry
+        self._register(entry)
 
         return rtsp_path
 
@@ -320,29 +499,14 @@ class RelayManager:
                 logger.info(f"External RTSP relay already running: {key}")
                 return rtsp_path
 
-        cmd = [
-            "ffmpeg", "-y",
-            "-rtsp_transport", "tcp",
-            "-i", source_url,
-            "-c:v", "copy",
-            "-an",
-            "-f", "rtsp",
-            "-rtsp_transport", "tcp",
-            rtsp_url,
-        ]
+        cmd = [*_EXT_CMD_INPUT, source_url, *_EXT_CMD_OUTPUT, rtsp_url]
 
         logger.info(f"Starting external RTSP relay: {key} -> {rtsp_url}")
-        proc = subprocess.Popen(
-            cmd, stdin=subprocess.DEVNULL,
-            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
-            text=True, bufsize=1,
-        )
-        threading.Thread(target=self._stderr_reader, args=(proc, key), daemon=True).start()
+        proc = self._spawn_ffmpeg(cmd, subprocess.DEVNULL, key)
 
-        entry = _RelayEntry(key, "external_rtsp", proc)
+        entry = _RelayEntry(key, "external_rtsp", proc, cmd)
 
-        with self._lock:
-            self._relays[key] = entry
+        self._register(entry)
 
         return rtsp_path
 
@@ -350,6 +514,8 @@ class RelayManager:
         """Stop a specific relay by key."""
         with self._lock:
             entry = self._relays.pop(key, None)
+            if entry:
+                self._pids.pop(entry.process.pid, None)
         if not entry:
             return
 
@@ -371,42 +537,84 @@ class RelayManager:
 
     def get_status(self):
         """Return status dict for all relays."""
-        result = {}
         with self._lock:
-            for key, entry in self._relays.items():
-                running = entry.process.poll() is None
-                uptime = time.time() - entry.started_at if running else 0
-                result[key] = {
-                    "type": entry.relay_type,
-                    "running": running,
-                    "uptime": round(uptime, 1),
-                    "restart_count": entry.restart_count,
-                }
+            snapshot = [(key, entry.relay_type, entry.process, entry.started_at, entry.restart_count)
+                        for key, entry in self._relays.items()]
+
+        # poll() is a waitpid syscall per relay: do it outside the lock
+        result = {}
+        now = time.time()
+        for key, relay_type, process, started_at, restart_count in snapshot:
+            running = process.poll() is None
+            uptime = now - started_at if running else 0
+            result[key] = {
+                "type": relay_type,
+                "running": running,
+                "uptime": round(uptime, 1),
+                "restart_count": restart_count,
+            }
         return result
 
     # --- Internal ---
 
+    def _spawn_ffmpeg(self, cmd, stdin, key):
+        """Start ffmpeg in binary mode; stderr is logged only when RELAY_LOG_FFMPEG is set.
+
+        close_fds=False with no preexec_fn/cwd/env/session options keeps
+        CPython on its posix_spawn fast path instead of fork + close-all-fds.
+        Python creates fds non-inheritable (PEP 446), so ffmpeg still
+        inherits only its stdio.
+        """
+        proc = subprocess.Popen(
+            cmd, stdin=stdin,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE if RELAY_LOG_FFMPEG else subprocess.DEVNULL,
+            bufsize=0,
+            close_fds=False,
+        )
+        if RELAY_LOG_FFMPEG:
+            threading.Thread(target=self._stderr_reader, args=(proc, key), daemon=True).start()
+        return proc
+
     @staticmethod
     def _stderr_reader(proc, key):
-        """Read ffmpeg stderr and log it."""
+        """Read ffmpeg stderr in bulk and log complete lines."""
+        fd = proc.stderr.fileno()
+        buf = b""
         try:
-            for line in proc.stderr:
-                line = line.strip()
-                if line:
-                    logger.info(f"ffmpeg[{key}]: {line}")
+            while True:
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    break
+                buf += chunk
+                if b"\n" not in buf and b"\r" not in buf:
+                    continue
+                *lines, buf = buf.replace(b"\r", b"\n").split(b"\n")
+                for line in lines:
+                    line = line.strip()
+                    if line:
+                        logger.info(f"ffmpeg[{key}]: {line.decode(errors='ignore')}")
         except Exception:
             pass
 
     def _feeder_loop(self, proc, frame_func, stop_event, key):
-        """Feed JPEG frames from gRPC to ffmpeg stdin."""
+        """Feed JPEG frames from gRPC to ffmpeg stdin.
+
+        Each frame is written as soon as it is fetched; the gRPC buffer is
+        handed to the kernel directly, without an intermediate copy.
+        When ffmpeg backpressures, the feeder blocks in select() on stdin
+        writability and the stop pipe instead of polling.
+        """
+        stdin_fd = proc.stdin.fileno()
+        os.set_blocking(stdin_fd, False)
         while not stop_event.is_set():
             try:
                 if proc.poll() is not None:
                     break
                 img = frame_func()
                 if img and img.data:
-                    proc.stdin.write(img.data)
-                    proc.stdin.flush()
+                    if not _writev_all(stdin_fd, [img.data], stop_event):
+                        break
             except (BrokenPipeError, OSError):
                 break
             except Exception as e:
@@ -419,6 +627,7 @@ class RelayManager:
             proc.stdin.close()
         except Exception:
             pass
+        stop_event.close()
 
     def _terminate_process(self, proc):
         """SIGTERM → 5s wait → SIGKILL."""
@@ -436,65 +645,127 @@ class RelayManager:
             except Exception:
                 pass
 
+    def _register(self, entry):
+        """Add entry to the relay table and pid index, replacing any previous entry for its key."""
+        with self._lock:
+            old = self._relays.get(entry.key)
+            if old:
+                self._pids.pop(old.process.pid, None)
+            self._relays[entry.key] = entry
+            self._pids[entry.process.pid] = entry
+
+    def _install_sigchld_handler(self):
+        """Wake the monitor thread on child exit (main thread only; else poll fallback)."""
+        if not hasattr(signal, "SIGCHLD"):
+            return
+        try:
+            self._prev_sigchld = signal.signal(signal.SIGCHLD, self._on_sigchld)
+        except ValueError:
+            logger.info("SIGCHLD handler not installed (not main thread), relay monitor will poll")
+            return
+        # SA_RESTART: a child exit must not surface as EINTR or short writes in
+        # other threads' blocking syscalls (gRPC, sqlite, pipe writes)
+        signal.siginterrupt(signal.SIGCHLD, False)
+
+    def _on_sigchld(self, signum, frame):
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass  # pipe full: a wakeup is already pending
+        if callable(self._prev_sigchld):
+            self._prev_sigchld(signum, frame)
+
     def _monitor_loop(self):
-        """Background thread: check relay health, restart dead processes."""
+        """Background thread: wait for child exit, schedule restarts of dead processes.
+
+        Blocks on the SIGCHLD self-pipe; MONITOR_INTERVAL is only a safety-net
+        timeout for when the signal handler could not be installed.
+        """
         while True:
-            time.sleep(MONITOR_INTERVAL)
+            readable, _, _ = select.select([self._wake_r], [], [], MONITOR_INTERVAL)
+            if readable:
+                try:
+                    os.read(self._wake_r, 4096)
+                except OSError:
+                    pass
+
             with self._lock:
-                entries = list(self._relays.values())
+                tracked = list(self._pids.items())
 
-            for entry in entries:
+            for pid, entry in tracked:
+                # Popen.poll() reaps only this pid, leaving other children untouched
                 if entry.process.poll() is None:
-                    continue  # still running
+                    continue
+
+                with self._lock:
+                    self._pids.pop(pid, None)
 
                 if entry.restart_count >= MAX_RETRIES:
                     logger.error(f"Relay {entry.key} exceeded max retries ({MAX_RETRIES}), giving up")
                     continue
 
                 delay = min(2 ** entry.restart_count, 30)
-                logger.warning(f"Relay {entry.key} died, restarting in {delay}s (attempt {entry.restart_count + 1})")
-                time.sleep(delay)
+                # Token bucket of one: never restart the same relay more than once per RESTART_MIN_INTERVAL
+                since_last = time.monotonic() - self._last_restart_at.get(entry.key, float("-inf"))
+                delay = max(delay, RESTART_MIN_INTERVAL - since_last)
+                logger.warning(f"Relay {entry.key} died, restarting in {delay:.1f}s (attempt {entry.restart_count + 1})")
+                timer = threading.Timer(delay, self._restart_entry, args=(entry,))
+                timer.daemon = True
+                timer.start()
+
+    def _restart_entry(self, entry):
+        """Respawn ffmpeg for a dead relay (runs on a Timer thread)."""
+        with self._lock:
+            if self._relays.get(entry.key) is not entry:
+                return  # stopped or replaced while the restart was pending
+        self._last_restart_at[entry.key] = time.monotonic()
 
-                # Restart
-                try:
-                    if entry.relay_type == "robot_camera" and entry.frame_func:
-                        old_cmd = entry.process.args
-                        new_proc = subprocess.Popen(
-                            old_cmd, stdin=subprocess.PIPE,
-                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
-                            text=True, bufsize=1,
-                        )
-                        threading.Thread(target=self._stderr_reader, args=(new_proc, entry.key), daemon=True).start()
-                        stop_event = threading.Event()
-                        feeder = threading.Thread(
-                            target=self._feeder_loop,
-                            args=(new_proc, entry.frame_func, stop_event, entry.key),
-                            daemon=True,
-                        )
-                        feeder.start()
-
-                        with self._lock:
-                            entry.process = new_proc
-                            entry.stop_event = stop_event
-                            entry.feeder_thread = feeder
-                            entry.restart_count += 1
-                            entry.started_at = time.time()
-                    else:
-                        old_cmd = entry.process.args
-                        new_proc = subprocess.Popen(
-                            old_cmd, stdin=subprocess.DEVNULL,
-                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
-                            text=True, bufsize=1,
-                        )
-                        threading.Thread(target=self._stderr_reader, args=(new_proc, entry.key), daemon=True).start()
-                        with self._lock:
-                            entry.process = new_proc
-                            entry.restart_count += 1
-                            entry.started_at = time.time()
-
-                    logger.info(f"Relay {entry.key} restarted successfully")
-                except Exception as e:
-                    logger.error(f"Failed to restart relay {entry.key}: {e}")
+        try:
+            stop_event = feeder = None
+            if entry.relay_type == "robot_camera" and entry.frame_func:
+                new_proc = self._spawn_ffmpeg(entry.cmd, subprocess.PIPE, entry.key)
+                stop_event = _StopPipe()
+                feeder = threading.Thread(
+                    target=self._feeder_loop,
+                    args=(new_proc, entry.frame_func, stop_event, entry.key),
+                    daemon=True,
+                )
+            else:
+                new_proc = self._spawn_ffmpeg(entry.cmd, subprocess.DEVNULL, entry.key)
+
+            with self._lock:
+                # Re-check: stop_relay() may have run while ffmpeg was spawning
+                current = self._relays.get(entry.key) is entry
+                if current:
+                    entry.process = new_proc
+                    if feeder:
+                        entry.stop_event = stop_event
+                        entry.feeder_thread = feeder
+                    entry.restart_count += 1
+                    entry.started_at = time.time()
+                    self._pids[new_proc.pid] = entry
+
+            if not current:
+                # Nobody tracks the new process: shut it down here
+                logger.info(f"Relay {entry.key} stopped during restart, discarding new ffmpeg")
+                if stop_event:
+                    stop_event.close()
+                    new_proc.stdin.close()
+                self._terminate_process(new_proc)
+                return
+
+            if feeder:
+                feeder.start()
+
+            logger.info(f"Relay {entry.key} restarted successfully")
+        except Exception as e:
+            logger.error(f"Failed to restart relay {entry.key}: {e}")
+            # Re-index the dead process so the next monitor wakeup retries it;
+            # the failed attempt counts toward MAX_RETRIES and the backoff
+            with self._lock:
+                if self._relays.get(entry.key) is entry:
+                    entry.restart_count += 1
+                    self._pids[entry.process.pid] = entry
 
 
 # === Module-level instances ===
@@ -16,8 +16,13 @@ Env vars:
 """
 
 import atexit
+import collections
+import fcntl
 import logging
 import os
+import re
+import select
+import shutil
 import signal
 import socket
 import subprocess
@@ -26,7 +31,8 @@ import threading
 import time
 from urllib.parse import urlparse
 
-from flask import Flask, request, jsonify
+import orjson
+from flask import Flask, Response, request, jsonify
 
 # --- Config ---
 
@@ -37,8 +43,56 @@ LOG_DIR = os.getenv("LOG_DIR", "./logs")
 
 MAX_RETRIES = 0  # 0 = unlimited retries
 MONITOR_INTERVAL = 10
+STATUS_CACHE_TTL = 1.0  # seconds a serialized GET /relays body may be reused
+RESTART_MIN_INTERVAL = 1.0  # min seconds between restarts of the same relay
 FEEDER_FPS = 0.5  # 1 frame per 2s (Jetson processes ~1.5s/frame)
 FEEDER_INTERVAL = 1.0 / FEEDER_FPS
+PIPE_SIZE = 1 << 20  # ffmpeg stdin pipe capacity: a whole 720p JPEG fits in one write
+
+# --- ffmpeg argv templates (fixed apart from the URLs, built once) ---
+
+# Absolute path lets subprocess use posix_spawn (it requires a path with a directory)
+_FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+
+_SCALE_720P = "scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2"
+
+if USE_NVENC:
+    _ENCODER_ARGS = (
+        "-c:v", "h264_nvmpi",
+        "-b:v", "2M",
+        "-pix_fmt", "yuv420p",
+    )
+else:
+    _ENCODER_ARGS = (
+        "-c:v", "libx264",
+        "-preset", "ultrafast", "-tune", "zerolatency",
+        "-profile:v", "baseline", "-level", "3.1",
+        "-pix_fmt", "yuv420p",
+        "-x264-params", "keyint=1:min-keyint=1:repeat-headers=1",
+        "-bsf:v", "dump_extra",
+    )
+
+# Robot camera: JPEG frames on stdin -> RTSP (append rtsp_url)
+_ROBOT_CMD_PREFIX = (
+    _FFMPEG, "-y", "-hide_banner", "-nostats",
+    "-f", "image2pipe", "-framerate", str(FEEDER_FPS), "-i", "pipe:0",
+    "-vf", _SCALE_720P,
+    *_ENCODER_ARGS,
+    "-f", "rtsp", "-rtsp_transport", "tcp",
+)
+
+# External RTSP: _EXT_CMD_INPUT + source_url + _EXT_CMD_OUTPUT + rtsp_url
+_EXT_CMD_INPUT = (
+    _FFMPEG, "-y", "-hide_banner", "-nostats", "-nostdin",
+    "-rtsp_transport", "tcp",
+    "-i",
+)
+_EXT_CMD_OUTPUT = (
+    "-an",
+    "-vf", f"fps=0.5,{_SCALE_720P}",
+    *_ENCODER_ARGS,
+    "-f", "rtsp", "-rtsp_transport", "tcp",
+)
 
 # --- Logging ---
 
@@ -57,13 +111,17 @@ logger.setLevel(logging.INFO)
 logger.addHandler(file_handler)
 logger.addHandler(stream_handler)
 
+# ffmpeg stderr lines worth an operator's attention; the rest is routine progress/info
+_FFMPEG_PROBLEM_RE = re.compile(
+    rb"error|warn|fail|invalid|unable|could not|broken|refused|timed out|no such", re.IGNORECASE)
+
 # --- Relay Entry ---
 
 
 class _RelayEntry:
-    __slots__ = ("key", "relay_type", "process", "feeder_thread", "stop_event",
+    __slots__ = ("key", "relay_type", "process",
                  "started_at", "restart_count", "source_url", "rtsp_url",
-                 "frame_buffer", "frame_lock")
+                 "inbox", "restart_pending")
 
     def __init__(self, key, relay_type, process, rtsp_url, source_url=None):
         self.key = key
@@ -71,13 +129,129 @@ class _RelayEntry:
         self.process = process
         self.rtsp_url = rtsp_url
         self.source_url = source_url
-        self.feeder_thread = None
-        self.stop_event = threading.Event()
         self.started_at = time.time()
         self.restart_count = 0
-        # Frame buffer for robot_camera type
-        self.frame_buffer = None
-        self.frame_lock = threading.Lock()
+        self.restart_pending = False
+        # Latest frame for robot_camera type (single producer, single consumer)
+        self.inbox = collections.deque(maxlen=1)
+
+
+# --- Frame Writer ---
+
+
+class _FrameWriter:
+    """Writes the latest frame of every robot_camera relay to its ffmpeg stdin.
+
+    One daemon thread serves all relays: each stdin fd is non-blocking, and
+    the thread select()s on the fds that still have part of a frame to write
+    plus a wake pipe, until the next relay is due. A relay whose ffmpeg has
+    not drained the previous frame by its next tick skips that tick, so one
+    stalled process cannot hold up the others.
+
+    feed_frame wakes the thread on every new frame, which is written on
+    arrival once at least half an interval has passed since the last write;
+    the tick then restarts from there. The writer thus locks onto the
+    sender's cadence and the last frame is only repeated when the sender
+    misses a tick (image2pipe stamps frames by count at a fixed -framerate,
+    and mediamtx drops a silent publisher, so ffmpeg must stay fed).
+    """
+
+    def __init__(self):
+        # entry -> [proc, fd, next_due (monotonic), pending memoryview or None, last frame written]
+        self._feeds = {}
+        self._closing = []  # stdin pipes to close from the writer thread
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def add(self, entry):
+        """Start feeding entry.process (replacing any previous process of entry)."""
+        proc = entry.process
+        fd = proc.stdin.fileno()
+        os.set_blocking(fd, False)
+        with self._lock:
+            old = self._feeds.get(entry)
+            if old:
+                self._closing.append(old[0].stdin)
+            self._feeds[entry] = [proc, fd, 0.0, None, None]
+        self.wake()
+
+    def remove(self, entry):
+        """Stop feeding entry; its stdin is closed by the writer thread."""
+        with self._lock:
+            feed = self._feeds.pop(entry, None)
+            if feed:
+                self._closing.append(feed[0].stdin)
+        if feed:
+            self.wake()
+
+    def wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # a wakeup is already pending
+
+    def _run(self):
+        while True:
+            timeout = None
+            wfds = []
+            with self._lock:
+                # Closed here so an fd is never closed (and reused) while select() watches it
+                for stdin in self._closing:
+                    try:
+                        stdin.close()
+                    except Exception:
+                        pass
+                self._closing = []
+
+                now = time.monotonic()
+                for entry, feed in list(self._feeds.items()):
+                    try:
+                        frame = entry.inbox[-1]
+                    except IndexError:
+                        continue  # no frame yet: feed_frame wakes us on the first one
+                    if self._write_at(feed, frame) <= now:
+                        feed[2] = now + FEEDER_INTERVAL
+                        if feed[3] is None:
+                            # New, or a repeat of the last one. Plain write() on purpose:
+                            # splice() from a memfd would hand ffmpeg references to pages
+                            # the next frame overwrites, and repeats are rare anyway.
+                            feed[3] = memoryview(frame)
+                            feed[4] = frame
+                    if feed[3] is not None and self._write(entry, feed):
+                        wfds.append(feed[1])
+                    if entry in self._feeds:
+                        wait = self._write_at(feed, frame) - now
+                        timeout = wait if timeout is None else min(timeout, wait)
+
+            r, _, _ = select.select([self._wake_r], wfds, [], timeout)
+            if r:
+                try:
+                    os.read(self._wake_r, 4096)
+                except BlockingIOError:
+                    pass
+
+    @staticmethod
+    def _write_at(feed, frame):
+        """When frame is next due: a new frame may go out up to half an interval early."""
+        return feed[2] - FEEDER_INTERVAL / 2 if frame is not feed[4] else feed[2]
+
+    def _write(self, entry, feed):
+        """Write as much of the pending frame as the pipe takes (caller holds _lock).
+
+        Returns True if part of the frame is still pending.
+        """
+        try:
+            written = os.write(feed[1], feed[3])
+        except BlockingIOError:
+            return True
+        except OSError:
+            # ffmpeg exited (EPIPE): the monitor restarts it and re-adds the entry
+            del self._feeds[entry]
+            self._closing.append(feed[0].stdin)
+            return False
+        feed[3] = feed[3][written:] or None
+        return feed[3] is not None
 
 
 # --- Relay Manager ---
@@ -88,7 +262,13 @@ class RelayServiceManager:
 
     def __init__(self):
         self._relays = {}  # key -> _RelayEntry
+        self._by_pid = {}  # pid -> _RelayEntry (None while spawned but not yet bound)
+        self._early_exits = {}  # pid -> wait status, for children reaped before being bound
+        self._retry = []  # entries whose restart attempt failed, retried next tick
         self._lock = threading.Lock()
+        self._last_restart_at = {}  # key -> monotonic time of last restart
+        self._writer = _FrameWriter()
+        self._status_cache = None  # (monotonic time, JSON bytes), None when stale
         self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self._monitor_thread.start()
         atexit.register(self.stop_all)
@@ -100,7 +280,8 @@ class RelayServiceManager:
         rtsp_url = f"rtsp://{target_host}{rtsp_path}"
 
         with self._lock:
-            if key in self._relays and self._relays[key].process.poll() is None:
+            # returncode, not poll(): only the monitor's waitpid(-1) may reap a tracked relay
+            if key in self._relays and self._relays[key].process.returncode is None:
                 logger.info(f"Relay already running: {key}")
                 return rtsp_path, None
 
@@ -117,22 +298,29 @@ class RelayServiceManager:
             return None, err
 
         entry = _RelayEntry(key, relay_type, proc, rtsp_url, source_url)
-
-        if relay_type == "robot_camera":
-            entry.feeder_thread = threading.Thread(
-                target=self._feeder_loop, args=(entry,), daemon=True)
-            entry.feeder_thread.start()
-
         threading.Thread(target=self._stderr_reader, args=(proc, key), daemon=True).start()
 
         with self._lock:
+            old = self._relays.get(key)
+            if old:
+                self._by_pid.pop(old.process.pid, None)
             self._relays[key] = entry
+            self._index_pid(entry)
+            self._status_cache = None
+        if old:
+            self._writer.remove(old)
+        if relay_type == "robot_camera":
+            self._writer.add(entry)
 
         logger.info(f"Relay started: {key} ({relay_type}) -> {rtsp_url}")
         return rtsp_path, None
 
     def feed_frame(self, key, jpeg_bytes):
-        """Feed a JPEG frame to a robot_camera relay."""
+        """Feed a JPEG frame to a robot_camera relay.
+
+        The bytes object is stored as-is (no copy); the frame writer writes
+        it straight to ffmpeg's stdin fd.
+        """
         with self._lock:
             entry = self._relays.get(key)
 
@@ -141,24 +329,25 @@ class RelayServiceManager:
         if entry.relay_type != "robot_camera":
             return False, "Not a robot_camera relay"
 
-        with entry.frame_lock:
-            entry.frame_buffer = jpeg_bytes
+        # No lock: deque.append is atomic, and maxlen=1 drops the older frame
+        entry.inbox.append(jpeg_bytes)
+        self._writer.wake()  # written on arrival rather than at the next tick
         return True, None
 
     def stop_relay(self, key):
         """Stop a specific relay."""
         with self._lock:
             entry = self._relays.pop(key, None)
+            if entry:
+                self._by_pid.pop(entry.process.pid, None)
+                self._status_cache = None
         if not entry:
             return
 
         logger.info(f"Stopping relay: {key}")
-        entry.stop_event.set()
+        self._writer.remove(entry)
         self._terminate_process(entry.process)
 
-        if entry.feeder_thread and entry.feeder_thread.is_alive():
-            entry.feeder_thread.join(timeout=3)
-
     def stop_all(self):
         """Stop all active relays."""
         with self._lock:
@@ -168,19 +357,38 @@ class RelayServiceManager:
 
     def get_status(self):
         """Return status dict for all relays."""
-        result = {}
         with self._lock:
-            for key, entry in self._relays.items():
-                running = entry.process.poll() is None
-                uptime = time.time() - entry.started_at if running else 0
-                result[key] = {
-                    "type": entry.relay_type,
-                    "running": running,
-                    "uptime": round(uptime, 1),
-                    "restart_count": entry.restart_count,
-                }
+            snapshot = [(key, entry.relay_type, entry.process, entry.started_at, entry.restart_count)
+                        for key, entry in self._relays.items()]
+
+        # returncode is set by _reap_dead; calling poll() here would reap the
+        # child itself and hide its death from the monitor
+        result = {}
+        now = time.time()
+        for key, relay_type, process, started_at, restart_count in snapshot:
+            running = process.returncode is None
+            uptime = now - started_at if running else 0
+            result[key] = {
+                "type": relay_type,
+                "running": running,
+                "uptime": round(uptime, 1),
+                "restart_count": restart_count,
+            }
         return result
 
+    def get_status_json(self):
+        """get_status() serialized with orjson, reused for up to STATUS_CACHE_TTL.
+
+        Dropped whenever a relay starts, stops, dies or restarts, so only
+        uptime can be stale.
+        """
+        cache = self._status_cache
+        if cache and time.monotonic() - cache[0] < STATUS_CACHE_TTL:
+            return cache[1]
+        body = orjson.dumps(self.get_status())
+        self._status_cache = (time.monotonic(), body)
+        return body
+
     def wait_for_stream(self, key, timeout=15):
         """Check if a relay's stream is ready on mediamtx via RTSP DESCRIBE."""
         with self._lock:
@@ -194,125 +402,89 @@ class RelayServiceManager:
 
     def _start_robot_camera(self, key, rtsp_url):
         """Start ffmpeg for robot camera relay (JPEG stdin → RTSP)."""
-        if USE_NVENC:
-            cmd = [
-                "ffmpeg", "-y",
-                "-f", "image2pipe", "-framerate", str(FEEDER_FPS), "-i", "pipe:0",
-                "-vf", "scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2",
-                "-c:v", "h264_nvmpi",
-                "-b:v", "2M",
-                "-pix_fmt", "yuv420p",
-                "-f", "rtsp", "-rtsp_transport", "tcp",
-                rtsp_url,
-            ]
-        else:
-            cmd = [
-                "ffmpeg", "-y",
-                "-f", "image2pipe", "-framerate", str(FEEDER_FPS), "-i", "pipe:0",
-                "-vf", "scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2",
-                "-c:v", "libx264",
-                "-preset", "ultrafast", "-tune", "zerolatency",
-                "-profile:v", "baseline", "-level", "3.1",
-                "-pix_fmt", "yuv420p",
-                "-x264-params", "keyint=1:min-keyint=1:repeat-headers=1",
-                "-bsf:v", "dump_extra",
-                "-f", "rtsp", "-rtsp_transport", "tcp",
-                rtsp_url,
-            ]
-
+        cmd = [*_ROBOT_CMD_PREFIX, rtsp_url]
         logger.info(f"Starting robot camera ffmpeg: {key} (nvenc={USE_NVENC})")
         try:
-            proc = subprocess.Popen(
-                cmd, stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
-                bufsize=0,
-            )
-            return proc, None
+            return self._spawn(cmd, subprocess.PIPE), None
         except Exception as e:
             return None, str(e)
 
     def _start_external_rtsp(self, key, source_url, rtsp_url):
         """Start ffmpeg for external RTSP relay (transcode to clean H264)."""
-        if USE_NVENC:
-            cmd = [
-                "ffmpeg", "-y",
-                "-rtsp_transport", "tcp",
-                "-i", source_url,
-                "-an",
-                "-vf", "fps=0.5,scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2",
-                "-c:v", "h264_nvmpi",
-                "-b:v", "2M",
-                "-pix_fmt", "yuv420p",
-                "-f", "rtsp", "-rtsp_transport", "tcp",
-                rtsp_url,
-            ]
-        else:
-            cmd = [
-                "ffmpeg", "-y",
-                "-rtsp_transport", "tcp",
-                "-i", source_url,
-                "-an",
-                "-vf", "fps=0.5,scale=1280:720:force_original_aspect_ratio=decrease,pad=1280:720:(ow-iw)/2:(oh-ih)/2",
-                "-c:v", "libx264",
-                "-preset", "ultrafast", "-tune", "zerolatency",
-                "-profile:v", "baseline", "-level", "3.1",
-                "-pix_fmt", "yuv420p",
-                "-x264-params", "keyint=1:min-keyint=1:repeat-headers=1",
-                "-bsf:v", "dump_extra",
-                "-f", "rtsp", "-rtsp_transport", "tcp",
-                rtsp_url,
-            ]
-
+        cmd = [*_EXT_CMD_INPUT, source_url, *_EXT_CMD_OUTPUT, rtsp_url]
         logger.info(f"Starting external RTSP ffmpeg: {key}")
         try:
-            proc = subprocess.Popen(
-                cmd, stdin=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
-                bufsize=0,
-            )
-            return proc, None
+            return self._spawn(cmd, subprocess.DEVNULL), None
         except Exception as e:
             return None, str(e)
 
-    def _feeder_loop(self, entry):
-        """Feed latest JPEG frame from buffer to ffmpeg stdin at configured FPS."""
-        while not entry.stop_event.is_set():
-            try:
-                if entry.process.poll() is not None:
-                    break
-
-                with entry.frame_lock:
-                    frame = entry.frame_buffer
-
-                if frame:
-                    entry.process.stdin.write(frame)
-                    entry.process.stdin.flush()
-            except (BrokenPipeError, OSError):
-                break
-            except Exception as e:
-                logger.debug(f"Feeder error for {entry.key}: {e}")
-
-            entry.stop_event.wait(FEEDER_INTERVAL)
-
-        try:
-            entry.process.stdin.close()
-        except Exception:
-            pass
+    def _spawn(self, cmd, stdin):
+        """Popen ffmpeg and reserve its pid in the index atomically w.r.t. the reaper."""
+        with self._lock:
+            # close_fds=False keeps Popen on the posix_spawn fast path instead of
+            # fork + closing every fd. ffmpeg still inherits only stdio: every fd
+            # Python opens (files, sockets, pipes) is non-inheritable (PEP 446).
+            proc = subprocess.Popen(
+                cmd, stdin=stdin,
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                bufsize=0, close_fds=False,
+            )
+            self._by_pid[proc.pid] = None  # bound to its entry by _index_pid()
+        if stdin == subprocess.PIPE:
+            _grow_pipe(proc.stdin.fileno())
+        return proc
 
     @staticmethod
     def _stderr_reader(proc, key):
-        """Read ffmpeg stderr and log it."""
+        """Read ffmpeg stderr in bulk and log it.
+
+        Problem lines (see _FFMPEG_PROBLEM_RE) are logged as warnings, with
+        consecutive repeats collapsed into a count; routine lines go to DEBUG
+        and are not even decoded unless DEBUG is enabled.
+        """
+        fd = proc.stderr.fileno()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        buf = b""
+        last, repeats = None, 0
         try:
-            for line in proc.stderr:
-                line_str = line.decode(errors="ignore").strip() if isinstance(line, bytes) else line.strip()
-                if line_str:
-                    logger.info(f"ffmpeg[{key}]: {line_str}")
+            while True:
+                chunk = os.read(fd, 4096)
+                if chunk:
+                    buf += chunk
+                    if b"\n" not in buf and b"\r" not in buf:
+                        continue
+                    *lines, buf = buf.replace(b"\r", b"\n").split(b"\n")
+                else:
+                    lines = [buf]  # EOF: flush an unterminated last line
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if not _FFMPEG_PROBLEM_RE.search(line):
+                        if debug:
+                            logger.debug(f"ffmpeg[{key}]: {line.decode(errors='ignore')}")
+                        continue
+                    if line == last:
+                        repeats += 1
+                        continue
+                    if repeats:
+                        logger.warning(f"ffmpeg[{key}]: last message repeated {repeats} times")
+                    last, repeats = line, 0
+                    logger.warning(f"ffmpeg[{key}]: {line.decode(errors='ignore')}")
+                if not chunk:
+                    break
+            if repeats:
+                logger.warning(f"ffmpeg[{key}]: last message repeated {repeats} times")
         except Exception:
             pass
 
     def _terminate_process(self, proc):
-        """SIGTERM → 5s wait → SIGKILL."""
-        if proc.poll() is not None:
+        """SIGTERM → 5s wait → SIGKILL.
+
+        Only called once the pid has left _by_pid, so waiting on it here can
+        no longer take an exit status the monitor needs.
+        """
+        if proc.returncode is not None:
             return
         try:
             proc.send_signal(signal.SIGTERM)
@@ -326,15 +498,63 @@ class RelayServiceManager:
             except Exception:
                 pass
 
+    def _index_pid(self, entry):
+        """Bind entry to its reserved pid in the index (caller holds _lock)."""
+        pid = entry.process.pid
+        status = self._early_exits.pop(pid, None)
+        if status is None:
+            self._by_pid[pid] = entry
+        else:
+            # Died before it was bound: record the exit and queue a restart
+            entry.process.returncode = os.waitstatus_to_exitcode(status)
+            self._retry.append(entry)
+
+    def _reap_dead(self):
+        """Reap every exited child with waitpid(-1) and map pids back to relays.
+
+        The relay service's only children are its ffmpeg relays, so reaping
+        with -1 is safe and costs one syscall per dead process instead of a
+        poll() per relay.
+        """
+        dead = []
+        while True:
+            # Held across waitpid so a pid is never reaped between Popen and _spawn's reservation
+            with self._lock:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                if pid not in self._by_pid:
+                    continue  # stopped relay, already removed
+                entry = self._by_pid.pop(pid)
+                if entry is None:
+                    self._early_exits[pid] = status
+                    continue
+            # Record the status on the Popen, since its own waitpid will now fail
+            entry.process.returncode = os.waitstatus_to_exitcode(status)
+            dead.append(entry)
+        return dead
+
     def _monitor_loop(self):
-        """Background thread: check relay health, restart dead processes."""
+        """Background thread: reap dead ffmpeg processes, schedule their restarts.
+
+        Each restart backs off on its own daemon Timer, so several dead
+        relays recover concurrently and a pending backoff never holds up
+        interpreter shutdown.
+        """
         while True:
             time.sleep(MONITOR_INTERVAL)
+            dead = self._reap_dead()
             with self._lock:
-                entries = list(self._relays.values())
+                if dead:
+                    self._status_cache = None
+                dead += self._retry
+                self._retry = []
 
-            for entry in entries:
-                if entry.process.poll() is None:
+            for entry in dead:
+                if entry.restart_pending:
                     continue
 
                 if MAX_RETRIES > 0 and entry.restart_count >= MAX_RETRIES:
@@ -342,74 +562,147 @@ class RelayServiceManager:
                     continue
 
                 delay = min(2 ** entry.restart_count, 30)
-                logger.warning(f"Relay {entry.key} died, restarting in {delay}s (attempt {entry.restart_count + 1})")
-                time.sleep(delay)
+                # Token bucket of one: never restart the same relay more than once per RESTART_MIN_INTERVAL
+                since_last = time.monotonic() - self._last_restart_at.get(entry.key, float("-inf"))
+                delay = max(delay, RESTART_MIN_INTERVAL - since_last)
+                logger.warning(f"Relay {entry.key} died, restarting in {delay:.1f}s (attempt {entry.restart_count + 1})")
+
+                entry.restart_pending = True
+                timer = threading.Timer(delay, self._attempt_restart, args=(entry,))
+                timer.daemon = True
+                timer.start()
+
+    def _attempt_restart(self, entry):
+        """Restart worker (runs on a Timer once the backoff elapses): respawn ffmpeg for a dead relay."""
+        try:
+            with self._lock:
+                if self._relays.get(entry.key) is not entry:
+                    return  # stopped or replaced while backing off
+            self._last_restart_at[entry.key] = time.monotonic()
+
+            if entry.relay_type == "robot_camera":
+                proc, err = self._start_robot_camera(entry.key, entry.rtsp_url)
+            else:
+                proc, err = self._start_external_rtsp(entry.key, entry.source_url, entry.rtsp_url)
+            if err:
+                raise RuntimeError(err)
+            threading.Thread(target=self._stderr_reader, args=(proc, entry.key), daemon=True).start()
+
+            # Swap in the new process before the writer picks up entry.process
+            with self._lock:
+                # Re-check: stop_relay() may have run while ffmpeg was spawning
+                current = self._relays.get(entry.key) is entry
+                if current:
+                    entry.process = proc
+                    entry.restart_count += 1
+                    entry.started_at = time.time()
+                    self._index_pid(entry)
+                    self._status_cache = None
+                else:
+                    self._by_pid.pop(proc.pid, None)
+                    self._early_exits.pop(proc.pid, None)
+
+            if not current:
+                # Nobody tracks the new process: shut it down here
+                logger.info(f"Relay {entry.key} stopped during restart, discarding new ffmpeg")
+                self._terminate_process(proc)
+                return
+
+            if entry.relay_type == "robot_camera":
+                self._writer.add(entry)
+                with self._lock:
+                    stopped = self._relays.get(entry.key) is not entry
+                if stopped:
+                    self._writer.remove(entry)  # stop_relay() ran between the swap and add()
+                    return
+
+            logger.info(f"Relay {entry.key} restarted successfully")
+            entry.restart_count = 0  # reset on success
+        except Exception as e:
+            logger.error(f"Failed to restart relay {entry.key}: {e}")
+            # Retried next tick; the failed attempt counts toward MAX_RETRIES and the backoff
+            with self._lock:
+                if self._relays.get(entry.key) is entry:
+                    entry.restart_count += 1
+                    self._retry.append(entry)
+        finally:
+            entry.restart_pending = False
 
-                try:
-                    if entry.relay_type == "robot_camera":
-                        proc, err = self._start_robot_camera(entry.key, entry.rtsp_url)
-                        if err:
-                            raise RuntimeError(err)
-                        threading.Thread(target=self._stderr_reader, args=(proc, entry.key), daemon=True).start()
-                        entry.stop_event = threading.Event()
-                        feeder = threading.Thread(target=self._feeder_loop, args=(entry,), daemon=True)
-                        feeder.start()
-                        with self._lock:
-                            entry.process = proc
-                            entry.feeder_thread = feeder
-                            entry.restart_count += 1
-                            entry.started_at = time.time()
-                    else:
-                        proc, err = self._start_external_rtsp(entry.key, entry.source_url, entry.rtsp_url)
-                        if err:
-                            raise RuntimeError(err)
-                        threading.Thread(target=self._stderr_reader, args=(proc, entry.key), daemon=True).start()
-                        with self._lock:
-                            entry.process = proc
-                            entry.restart_count += 1
-                            entry.started_at = time.time()
-
-                    logger.info(f"Relay {entry.key} restarted successfully")
-                    entry.restart_count = 0  # reset on success
-                except Exception as e:
-                    logger.error(f"Failed to restart relay {entry.key}: {e}")
+
+# --- Pipe helpers ---
+
+
+def _grow_pipe(fd):
+    """Raise a pipe's capacity to PIPE_SIZE (Linux only, best effort)."""
+    try:
+        fcntl.fcntl(fd, getattr(fcntl, "F_SETPIPE_SZ", 1031), PIPE_SIZE)
+    except OSError as e:
+        # Capped by /proc/sys/fs/pipe-max-size for unprivileged users
+        logger.debug(f"F_SETPIPE_SZ failed on fd {fd}: {e}")
 
 
 # --- Stream readiness check ---
 
 
 def _wait_for_stream(rtsp_url, max_wait=20):
-    """Poll RTSP URL via DESCRIBE until the stream is ready on mediamtx."""
+    """Poll RTSP URL via DESCRIBE until the stream is ready on mediamtx.
+
+    One connection is reused across attempts (requests are told apart by
+    CSeq) and the retry delay backs off 100ms → 2s. Connect and read
+    timeouts are clipped to the time left, so the last attempt cannot
+    overrun max_wait.
+    """
     parsed = urlparse(rtsp_url)
     host = parsed.hostname
     port = parsed.port or 8554
     path = parsed.path or "/"
 
-    deadline = time.time() + max_wait
+    start = time.monotonic()
+    deadline = start + max_wait
     attempt = 0
-
-    while time.time() < deadline:
-        attempt += 1
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(3)
-            s.connect((host, port))
-            describe = (
-                f"DESCRIBE rtsp://{host}:{port}{path} RTSP/1.0\r\n"
-                f"CSeq: 1\r\n"
-                f"\r\n"
-            )
-            s.sendall(describe.encode())
-            resp = s.recv(1024).decode(errors="ignore")
+    backoff = 0.1
+    addr = None  # resolved once, reused for every reconnect
+    s = None
+    # Encoded once; only the CSeq number is filled in per attempt
+    describe = (
+        f"DESCRIBE rtsp://{host}:{port}{path.replace('%', '%%')} RTSP/1.0\r\n"
+        f"CSeq: %d\r\n"
+        f"\r\n"
+    ).encode()
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            attempt += 1
+            try:
+                if addr is None:
+                    addr = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][4]
+                if s is None:
+                    s = socket.create_connection(addr, timeout=min(3, remaining))
+                    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                s.settimeout(min(3, remaining))
+                s.sendall(describe % attempt)
+                resp = s.recv(1024).decode(errors="ignore")
+
+                if "RTSP/1.0 200" in resp:
+                    logger.info(f"Stream ready after {attempt} attempts "
+                                f"({time.monotonic() - start:.1f}s): {rtsp_url}")
+                    return True
+                if not resp:
+                    s.close()  # server closed the connection; reopen next attempt
+                    s = None
+            except Exception:
+                if s is not None:
+                    s.close()
+                    s = None
+            time.sleep(max(0, min(backoff, deadline - time.monotonic())))
+            backoff = min(backoff * 2, 2.0)
+    finally:
+        if s is not None:
             s.close()
 
-            if "RTSP/1.0 200" in resp:
-                logger.info(f"Stream ready after {attempt} attempts: {rtsp_url}")
-                return True
-        except Exception:
-            pass
-        time.sleep(1)
-
     logger.warning(f"Stream not ready after {max_wait}s ({attempt} attempts): {rtsp_url}")
     return False
 
@@ -427,7 +720,7 @@ def health():
 
 @app.route("/relays", methods=["GET"])
 def list_relays():
-    return jsonify(manager.get_status())
+    return Response(manager.get_status_json(), mimetype="application/json")
 
 
 @app.route("/relays", methods=["POST"])
@@ -451,7 +744,9 @@ def start_relay():
 
 @app.route("/relays/<path:key>/frame", methods=["POST"])
 def feed_frame(key):
-    jpeg_bytes = request.get_data()
+    # Read the body once and hand it to the feeder by reference; don't let
+    # werkzeug keep a second reference to every frame on the request.
+    jpeg_bytes = request.get_data(cache=False)
     if not jpeg_bytes:
         return jsonify({"error": "empty body"}), 400
 
@@ -481,6 +776,22 @@ def stop_all_relays():
     return jsonify({"stopped": "all"})
 
 
+def _handle_sigterm(signum, frame):
+    """Stop every ffmpeg before exiting, so mediamtx frees the RTSP paths.
+
+    Without a handler SIGTERM kills the process outright (atexit never runs),
+    and as PID 1 in the container it is ignored until docker stop escalates
+    to SIGKILL.
+    """
+    logger.info("SIGTERM received, stopping all relays")
+    manager.stop_all()
+    sys.exit(0)
+
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _handle_sigterm)
     logger.info(f"Relay Service starting on port {PORT} (mediamtx={MEDIAMTX_HOST}, nvenc={USE_NVENC})")
-    app.run(host="0.0.0.0", port=PORT, debug=False)
+    # Single process on purpose: relays and their frame inboxes live in this
+    # process's manager, so every request must reach the same one. Requests
+    # (frame POSTs from several backends) are served concurrently on threads.
+    app.run(host="0.0.0.0", port=PORT, debug=False, threaded=True)
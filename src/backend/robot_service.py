@@ -1,14 +1,21 @@
+import operator
 import threading
 import time
 import kachaka_api
 from config import ROBOT_IP
 
+POSE_POLL_INTERVAL = 0.1  # seconds
+BATTERY_POLL_INTERVAL = 2.0  # battery drains slowly; poll it less often than pose
+
 
 class RobotService:
     def __init__(self):
         self.client = None
+        self.serial = None  # fetched once per connection
         self.client_lock = threading.Lock()  # Lock for client access (TOCTOU fix)
-        self.state_lock = threading.Lock()
+        self.state_lock = threading.Lock()  # guards map_image_bytes
+        # Snapshot replaced wholesale by the polling thread and never mutated
+        # after publication, so readers can take it without a lock.
         self.robot_state = {
             "battery": 0,
             "pose": {"x": 0.0, "y": 0.0, "theta": 0.0},
@@ -31,9 +38,10 @@ class RobotService:
 
         try:
             new_client = kachaka_api.KachakaApiClient(target_ip)
-            new_client.get_robot_serial_number()
+            serial = new_client.get_robot_serial_number()
             with self.client_lock:
                 self.client = new_client
+                self.serial = serial
             print(f"Connected to Kachaka at {target_ip}")
             return True
         except Exception as e:
@@ -47,6 +55,10 @@ class RobotService:
             return self.client
 
     def _polling_loop(self):
+        next_poll = time.monotonic()
+        next_battery = next_poll
+        polled_client = None
+        pose_getter = None  # picked from the first pose of each connection
         while True:
             with self.client_lock:
                 current_client = self.client
@@ -57,6 +69,7 @@ class RobotService:
                     current_client = self.client
                 if not current_client:
                     time.sleep(2)
+                    next_poll = time.monotonic()
                     continue
 
             # Fetch map if missing
@@ -68,35 +81,53 @@ class RobotService:
                     png_map = current_client.get_png_map()
                     with self.state_lock:
                         self.map_image_bytes = png_map.data
-                        self.robot_state["map_info"].update({
+                    self.robot_state = {
+                        **self.robot_state,
+                        "map_info": {
                             "resolution": png_map.resolution,
                             "width": png_map.width,
                             "height": png_map.height,
                             "origin_x": png_map.origin.x,
                             "origin_y": png_map.origin.y
-                        })
+                        },
+                    }
                 except Exception as e:
                     print(f"Error fetching map: {e}")
 
             # Poll status
             try:
                 pose = current_client.get_robot_pose()
-                battery = current_client.get_battery_info()
-
-                with self.state_lock:
-                    actual_pose = getattr(pose, 'pose', pose)
-                    self.robot_state["pose"].update({
-                        "x": actual_pose.x,
-                        "y": actual_pose.y,
-                        "theta": actual_pose.theta
-                    })
-
-                    if isinstance(battery, tuple) and len(battery) > 0:
-                        self.robot_state["battery"] = int(battery[0])
-                    elif hasattr(battery, 'percentage'):
-                        self.robot_state["battery"] = int(battery.percentage)
-                    else:
-                        self.robot_state["battery"] = int(battery) if isinstance(battery, (int, float)) else 0
+                if current_client is not polled_client:
+                    # Pose may come wrapped (pose.pose.x) or bare (pose.x) depending
+                    # on the kachaka_api version; the shape is fixed per client.
+                    fields = ('x', 'y', 'theta')
+                    if hasattr(pose, 'pose'):
+                        fields = tuple(f'pose.{f}' for f in fields)
+                    pose_getter = operator.attrgetter(*fields)
+                    polled_client = current_client
+                x, y, theta = pose_getter(pose)
+                battery = None
+                if time.monotonic() >= next_battery:
+                    battery = current_client.get_battery_info()
+                    next_battery = time.monotonic() + BATTERY_POLL_INTERVAL
+
+                state = self.robot_state
+                battery_level = state["battery"]  # not due this iteration
+                if battery is None:
+                    pass
+                elif isinstance(battery, tuple) and len(battery) > 0:
+                    battery_level = int(battery[0])
+                elif hasattr(battery, 'percentage'):
+                    battery_level = int(battery.percentage)
+                else:
+                    battery_level = int(battery) if isinstance(battery, (int, float)) else 0
+
+                # Publish a new snapshot: a single reference assignment
+                self.robot_state = {
+                    "battery": battery_level,
+                    "pose": {"x": x, "y": y, "theta": theta},
+                    "map_info": state["map_info"],
+                }
 
             except Exception as e:
                 print(f"Error polling robot state: {e}")
@@ -104,11 +135,17 @@ class RobotService:
                 with self.client_lock:
                     self.client = None
 
-            time.sleep(0.1)
+            # Fixed-rate schedule on the monotonic clock, so RPC time doesn't add drift
+            next_poll += POSE_POLL_INTERVAL
+            now = time.monotonic()
+            if next_poll > now:
+                time.sleep(next_poll - now)
+            else:
+                next_poll = now  # fell behind (slow RPC): don't try to catch up
 
     def get_state(self):
-        with self.state_lock:
-            return self.robot_state.copy()
+        """Return the current state snapshot. Treat it as read-only."""
+        return self.robot_state
 
     def get_map_bytes(self):
         with self.state_lock:
@@ -161,9 +198,8 @@ class RobotService:
 
     def get_serial(self):
         with self.client_lock:
-            client = self.client
-        if client:
-            return client.get_robot_serial_number()
+            if self.client and self.serial:
+                return self.serial
         return "unknown"
 
     def get_locations(self):
@@ -5,18 +5,59 @@ Replaces file-based settings.json with shared DB storage.
 
 import json
 import os
+import threading
+import time
 from config import DEFAULT_SETTINGS
 from database import get_global_settings, save_global_settings
 
+# Settings are read far more often than written; reuse a DB read for a few
+# seconds. Saves from this process invalidate immediately, saves from other
+# processes sharing the DB show up within the TTL.
+SETTINGS_CACHE_TTL = 5.0
+
+_cache = None  # (monotonic time, settings dict); never mutated once stored
+# Single-flight: on expiry one thread reads the DB, concurrent callers wait
+# for its result instead of each running the same query
+_cache_lock = threading.Lock()
+_generation = 0  # bumped by invalidate() so an in-flight read isn't stored
+
+# Set once settings.json has been imported (or found superseded by the DB).
+# Internal bookkeeping: hidden from get/get_all and never written by save().
+_MIGRATED_KEY = "_settings_migrated_v1"
+
+
+def _cached_settings():
+    global _cache
+    cache = _cache
+    if cache is not None and time.monotonic() - cache[0] < SETTINGS_CACHE_TTL:
+        return cache[1]
+    with _cache_lock:
+        cache = _cache
+        if cache is not None and time.monotonic() - cache[0] < SETTINGS_CACHE_TTL:
+            return cache[1]  # another thread refreshed it while we waited
+        generation = _generation
+        settings = get_global_settings()
+        settings.pop(_MIGRATED_KEY, None)
+        if generation == _generation:
+            _cache = (time.monotonic(), settings)
+        return settings
+
+
+def invalidate():
+    """Drop cached settings so the next read goes to the DB."""
+    global _cache, _generation
+    _generation += 1
+    _cache = None
+
 
 def get_all():
-    """Get all settings merged with defaults."""
-    return get_global_settings()
+    """Get all settings merged with defaults (a copy the caller may modify)."""
+    return dict(_cached_settings())
 
 
 def get(key, default=None):
     """Get a single setting value."""
-    settings = get_global_settings()
+    settings = _cached_settings()
     if default is not None:
         return settings.get(key, default)
     return settings.get(key, DEFAULT_SETTINGS.get(key))
@@ -24,7 +65,10 @@ def get(key, default=None):
 
 def save(settings_dict):
     """Save settings dict to DB."""
+    if _MIGRATED_KEY in settings_dict:
+        settings_dict = {k: v for k, v in settings_dict.items() if k != _MIGRATED_KEY}
     save_global_settings(settings_dict)
+    invalidate()
 
 
 def migrate_from_json(json_path):
@@ -32,16 +76,15 @@ def migrate_from_json(json_path):
     if not os.path.exists(json_path):
         return False
 
-    # Check if DB already has settings (skip if already migrated)
     current = get_global_settings()
-    # If any non-default key has been set, assume migration already happened
-    has_custom = False
-    for key in current:
-        if key in DEFAULT_SETTINGS and current[key] != DEFAULT_SETTINGS[key]:
-            has_custom = True
-            break
-
-    if has_custom:
+    if current.get(_MIGRATED_KEY):
+        return False
+
+    # DBs migrated before the marker existed: if any setting differs from its
+    # default, assume migration already happened and just record the marker
+    if any(key in DEFAULT_SETTINGS and current[key] != DEFAULT_SETTINGS[key] for key in current):
+        save_global_settings({_MIGRATED_KEY: True})
+        invalidate()
         return False
 
     try:
@@ -49,7 +92,8 @@ def migrate_from_json(json_path):
             file_settings = json.load(f)
 
         if isinstance(file_settings, dict) and file_settings:
-            save_global_settings(file_settings)
+            save_global_settings({**file_settings, _MIGRATED_KEY: True})
+            invalidate()
             print(f"Migrated settings from {json_path} to database")
             return True
     except Exception as e:
@@ -4,69 +4,145 @@ Includes JSON I/O and timezone-aware time utilities.
 """
 
 import os
-import json
 import tempfile
-import shutil
 from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
-
-def _get_settings():
-    """Get settings from database via settings_service."""
-    import settings_service
-    return settings_service.get_all()
+import orjson
 
 
-def _get_timezone():
-    """Get configured timezone, with fallback to UTC."""
-    settings = _get_settings()
-    tz_name = settings.get('timezone', 'UTC')
+@lru_cache(maxsize=8)
+def _zone(tz_name):
+    """Resolve a timezone name once, with fallback to UTC."""
     try:
         return ZoneInfo(tz_name)
     except Exception:
         return ZoneInfo("UTC")
 
 
+def _get_timezone():
+    """Get configured timezone, with fallback to UTC."""
+    import settings_service
+    # settings_service caches the settings row (invalidated on save)
+    return _zone(settings_service.get('timezone', 'UTC'))
+
+
 # === JSON I/O ===
 
 def load_json(filepath, default=None):
     """Load JSON file with fallback to default value."""
     if default is None:
         default = {}
-    if not os.path.exists(filepath):
-        return default
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # Unbuffered: readall() sizes one read from fstat, no wrapper chunking.
+        # A missing file is just another exception, so no exists() stat first.
+        with open(filepath, 'rb', buffering=0) as f:
+            return orjson.loads(f.readall())
     except Exception:
         return default
 
 
-def save_json(filepath, data):
+def save_json(filepath, data, durable=True, verify=False):
     """
     Atomically save JSON data to file.
-    Uses temp file + rename to prevent corruption on crash.
+    Uses temp file + fsync + rename (+ fsync of the directory) so a crash
+    leaves either the old or the new file, never an empty one.
+    durable=False skips both fsyncs (still atomic, just not crash-safe).
+    verify=True re-reads the temp file and compares it with what was written
+    before the rename.
     """
     dir_path = os.path.dirname(filepath)
-    if dir_path and not os.path.exists(dir_path):
+    if dir_path:
         os.makedirs(dir_path, exist_ok=True)
 
+    temp_path = _write_temp(dir_path, data, durable, verify)
+    try:
+        os.replace(temp_path, filepath)
+    except Exception:
+        _discard(temp_path)
+        raise
+    if durable:
+        _fsync_dir(dir_path or '.')
+
+
+def save_json_many(items, durable=True):
+    """
+    Atomically save several (filepath, data) pairs.
+    All temp files are written and renamed first, then each directory is
+    fsynced once, instead of once per file.
+    """
+    dirs = set()
+    for filepath, data in items:
+        dir_path = os.path.dirname(filepath)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+        temp_path = _write_temp(dir_path, data, durable)
+        try:
+            os.replace(temp_path, filepath)
+        except Exception:
+            _discard(temp_path)
+            raise
+        dirs.add(dir_path or '.')
+
+    if durable:
+        for dir_path in dirs:
+            _fsync_dir(dir_path)
+
+
+def _write_temp(dir_path, data, durable, verify=False):
+    """Write data to a new temp file in dir_path and return its path."""
     fd, temp_path = tempfile.mkstemp(suffix='.json', dir=dir_path)
     try:
-        with os.fdopen(fd, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        shutil.move(temp_path, filepath)
+        # One UTF-8 buffer, one write; OPT_NON_STR_KEYS stringifies int keys like json did
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        if verify:
+            with open(temp_path, 'rb', buffering=0) as f:
+                written = f.readall()
+            if written != payload:
+                raise OSError(f"Verification failed writing {temp_path}")
     except Exception:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        _discard(temp_path)
         raise
+    return temp_path
+
+
+def _discard(temp_path):
+    """Remove a leftover temp file; it may already be gone."""
+    try:
+        os.unlink(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+def _fsync_dir(dir_path):
+    """Persist a rename by fsyncing its directory (best effort, POSIX only)."""
+    try:
+        dir_fd = os.open(dir_path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
 
 
 # === Time Utilities ===
 
 def get_current_time_str():
     """Returns current time as 'YYYY-MM-DD HH:MM:SS' in configured timezone."""
-    return datetime.now(_get_timezone()).strftime("%Y-%m-%d %H:%M:%S")
+    dt = datetime.now(_get_timezone())
+    # Field formatting skips strftime's format parsing and locale lookups
+    return (f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} "
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}")
 
 
 def get_current_datetime():
@@ -76,7 +152,9 @@ def get_current_datetime():
 
 def get_filename_timestamp():
     """Returns current time as 'YYYYMMDD_HHMMSS' for filenames."""
-    return datetime.now(_get_timezone()).strftime("%Y%m%d_%H%M%S")
+    dt = datetime.now(_get_timezone())
+    return (f"{dt.year:04d}{dt.month:02d}{dt.day:02d}_"
+            f"{dt.hour:02d}{dt.minute:02d}{dt.second:02d}")
 
 
 # === Image Utilities ===
@@ -86,7 +164,7 @@ def rename_image_with_status(image_path, is_ng):
     Rename image file to include OK/NG status.
     Example: image.jpg -> image_OK.jpg or image_NG.jpg
     """
-    if not image_path or not os.path.exists(image_path):
+    if not image_path:
         return image_path
 
     status_tag = "NG" if is_ng else "OK"
@@ -97,6 +175,7 @@ def rename_image_with_status(image_path, is_ng):
         return image_path
 
     new_path = f"{base}_{status_tag}{ext}"
+    # No exists() check first: a missing source just makes rename() fail
     try:
         os.rename(image_path, new_path)
         return new_path
@@ -1,14 +1,119 @@
 
+import os
+import queue
+from functools import lru_cache
+import shutil
+import subprocess
 import threading
 import time
 import cv2
 import numpy as np
-import io
-from PIL import Image
 from logger import get_logger
 
 logger = get_logger("video_recorder", "video_recorder.log")
 
+_FFMPEG = shutil.which("ffmpeg")
+
+
+@lru_cache(maxsize=None)
+def _has_encoder(name):
+    """True if the installed ffmpeg lists the named encoder in `ffmpeg -encoders`."""
+    if not _FFMPEG:
+        return False
+    try:
+        out = subprocess.run(
+            [_FFMPEG, "-hide_banner", "-encoders"],
+            stdin=subprocess.DEVNULL, capture_output=True, timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return f" {name} ".encode() in out
+
+# OpenCV writer codecs by tag, computed once
+_FOURCC = {tag: cv2.VideoWriter_fourcc(*tag) for tag in ('avc1', 'XVID', 'MJPG')}
+
+# JPEG downscale factors applied inside the decoder (DCT scaling), largest first
+_DECODE_SCALES = (8, 4, 2)
+_CV2_DECODE_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                     4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+# libjpeg-turbo bindings decode straight to BGR without OpenCV's codec
+# dispatch; optional, since they need the libturbojpeg shared library
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _TURBOJPEG = TurboJPEG()
+except Exception:
+    _TURBOJPEG = None
+
+
+class _FfmpegWriter:
+    """cv2.VideoWriter look-alike that pipes raw BGR frames into ffmpeg libx264.
+
+    OpenCV's avc1 writer depends on how OpenCV was built (often missing, or a
+    slow OpenH264), so ffmpeg is preferred for .mp4 when it is installed.
+    """
+
+    def __init__(self, output_path, fps, size):
+        width, height = size
+        cmd = [
+            _FFMPEG, "-y", "-hide_banner", "-nostats", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}",
+            "-framerate", str(fps), "-i", "pipe:0",
+            "-an", "-c:v", "libx264", "-preset", "ultrafast",
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+            output_path,
+        ]
+        self._proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE, bufsize=0, close_fds=False,
+        )
+        threading.Thread(target=self._log_stderr, daemon=True).start()
+
+    def _log_stderr(self):
+        """Log ffmpeg's error output (-loglevel error, so only real problems)."""
+        try:
+            for line in self._proc.stderr:
+                line = line.strip()
+                if line:
+                    logger.warning(f"ffmpeg video writer: {line.decode(errors='ignore')}")
+        except (OSError, ValueError):
+            pass
+
+    def isOpened(self):
+        return self._proc.poll() is None
+
+    def write(self, frame):
+        # Through write_many's loop: stdin is unbuffered, so a signal can cut a
+        # large pipe write short, and a lost tail would shift every later frame
+        self.write_many((frame,))
+
+    def write_many(self, frames):
+        """Write several frames with one writev() instead of a write() each."""
+        # Contiguous ndarrays: written from their buffers, no tobytes() copy
+        views = [memoryview(frame).cast('B') for frame in frames]
+        fd = self._proc.stdin.fileno()
+        while views:
+            written = os.writev(fd, views)
+            # Short write (e.g. interrupted): drop what went out, retry the rest
+            while views and written >= len(views[0]):
+                written -= len(views.pop(0))
+            if written:
+                views[0] = views[0][written:]
+
+    def release(self):
+        """Close stdin and let ffmpeg finish the file (writes the moov atom)."""
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            returncode = self._proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            returncode = self._proc.wait()
+        if returncode != 0:
+            logger.warning(f"ffmpeg video writer exited with code {returncode}")
+
 class VideoRecorder:
     def __init__(self, output_path, frame_func, fps=5.0, width=640, height=480):
         self.output_path = output_path
@@ -17,8 +122,21 @@ class VideoRecorder:
         self.width = width
         self.height = height
         self.is_recording = False
+        self._stop_event = threading.Event()  # wakes the capture thread on stop()
         self.thread = None
+        self.encode_thread = None
         self.writer = None
+        # Decoded frames waiting for the encoder; small so a stalled writer
+        # drops frames instead of buffering them
+        self._frames = queue.Queue(maxsize=2)
+        # Resize targets reused round-robin, advancing only when a frame is
+        # queued: enough that none is still queued or being encoded when its
+        # turn comes again (queue + an encoder batch of up to queue + 1 frames
+        # + capture)
+        self._frame_bufs = []
+        # JPEG decode downscale factor, picked from the first frame's size
+        self._decode_scale = 1
+        self._codecs = []  # (fourcc tag or None for ffmpeg, name) not tried yet
 
     def start(self):
         if self.is_recording:
@@ -26,30 +144,31 @@ class VideoRecorder:
         
         try:
             # Try codecs in order of preference.
-            # H.264 (avc1) is best for browser/IDE compatibility but may
-            # not be available on all platforms (e.g. ARM without hw encoder).
+            # H.264 is best for browser/IDE compatibility: encode it with
+            # ffmpeg when installed, else OpenCV's avc1, which may not be
+            # available on all platforms (e.g. ARM without hw encoder).
             if self.output_path.endswith('.mp4'):
                 codecs = [('avc1', 'H.264'), ('XVID', 'XVID'), ('MJPG', 'MJPEG')]
+                if _has_encoder("libx264"):
+                    codecs.insert(0, (None, 'H.264 (ffmpeg libx264)'))
             else:
                 codecs = [('MJPG', 'MJPEG')]
 
-            for codec_tag, codec_name in codecs:
-                fourcc = cv2.VideoWriter_fourcc(*codec_tag)
-                self.writer = cv2.VideoWriter(
-                    self.output_path, fourcc, self.fps, (self.width, self.height)
-                )
-                if self.writer.isOpened():
-                    logger.info(f"Using {codec_name} codec for {self.output_path}")
-                    break
-                self.writer.release()
-                logger.warning(f"{codec_name} codec unavailable, trying next...")
-                self.writer = None
+            # Codecs not tried yet, kept so the encoder can still fall back if
+            # the chosen writer fails on its first frame
+            self._codecs = codecs
+            self.writer = self._open_next_writer()
 
-            if self.writer is None or not self.writer.isOpened():
+            if self.writer is None:
                 logger.error(f"Failed to open video writer for {self.output_path}")
                 return
 
+            self._frame_bufs = [np.empty((self.height, self.width, 3), np.uint8)
+                                for _ in range(2 * self._frames.maxsize + 2)]
             self.is_recording = True
+            self._stop_event.clear()
+            self.encode_thread = threading.Thread(target=self._encode_loop, daemon=True)
+            self.encode_thread.start()
             self.thread = threading.Thread(target=self._record_loop, daemon=True)
             self.thread.start()
             logger.info(f"Started video recording: {self.output_path}")
@@ -57,14 +176,51 @@ class VideoRecorder:
         except Exception as e:
             logger.error(f"Failed to start video recording: {e}")
 
+    def _open_next_writer(self):
+        """Open the next untried codec's writer; None once all have failed."""
+        while self._codecs:
+            codec_tag, codec_name = self._codecs.pop(0)
+            if codec_tag is None:
+                writer = _FfmpegWriter(self.output_path, self.fps, (self.width, self.height))
+            else:
+                writer = cv2.VideoWriter(
+                    self.output_path, _FOURCC[codec_tag], self.fps, (self.width, self.height)
+                )
+            if writer.isOpened():
+                logger.info(f"Using {codec_name} codec for {self.output_path}")
+                return writer
+            writer.release()
+            logger.warning(f"{codec_name} codec unavailable, trying next...")
+        return None
+
     def stop(self):
         if not self.is_recording:
             return
         
         self.is_recording = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=5)
             self.thread = None
+
+        if self.encode_thread:
+            # Sentinel: flush queued frames, then exit. Bounded, so an encoder
+            # stuck in a write can't hang stop(): drop the queued frames instead
+            try:
+                self._frames.put(None, timeout=2)
+            except queue.Full:
+                logger.warning("Encoder not draining, dropping queued frames")
+                while True:
+                    try:
+                        self._frames.get_nowait()
+                    except queue.Empty:
+                        break
+                try:
+                    self._frames.put_nowait(None)
+                except queue.Full:
+                    pass
+            self.encode_thread.join(timeout=5)
+            self.encode_thread = None
             
         if self.writer:
             self.writer.release()
@@ -73,36 +229,126 @@ class VideoRecorder:
         logger.info("Stopped video recording")
 
     def _record_loop(self):
+        """Capture thread: grab, decode and resize frames at the target FPS."""
         interval = 1.0 / self.fps
-        
+        next_frame = time.monotonic()
+        buf_index = 0
+        decode_scale_chosen = False
+
         while self.is_recording:
-            start_time = time.time()
-            
             try:
                 # Get frame from robot service
                 ros_image = self.frame_func()
                 
                 if ros_image:
-                    # Convert bytes to PIL Image
-                    image = Image.open(io.BytesIO(ros_image.data))
-                    
-                    # Resize if needed (naive resize for now)
-                    if image.size != (self.width, self.height):
-                         image = image.resize((self.width, self.height))
-                    
-                    # Convert to numpy array (RGB)
-                    frame_rgb = np.array(image)
-                    
-                    # Convert to BGR for OpenCV
-                    frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
-                    
-                    if self.writer:
-                        self.writer.write(frame_bgr)
+                    frame_bgr = self._decode(ros_image.data)
+                    if frame_bgr is None:
+                        raise ValueError("could not decode camera frame")
+                    if not decode_scale_chosen:
+                        decode_scale_chosen = True
+                        self._choose_decode_scale(frame_bgr.shape[1], frame_bgr.shape[0])
+
+                    # Resize if needed
+                    in_ring = frame_bgr.shape[1::-1] != (self.width, self.height)
+                    if in_ring:
+                        frame_bgr = cv2.resize(frame_bgr, (self.width, self.height),
+                                               dst=self._frame_bufs[buf_index],
+                                               interpolation=cv2.INTER_AREA)
+
+                    try:
+                        self._frames.put_nowait(frame_bgr)
+                    except queue.Full:
+                        # The slot stays ours: reused by the next frame, never
+                        # advanced onto one that is still queued or encoding
+                        logger.debug("Encoder behind, dropping frame")
+                    else:
+                        if in_ring:
+                            buf_index = (buf_index + 1) % len(self._frame_bufs)
                         
             except Exception as e:
                 logger.error(f"Error recording frame: {e}")
                 
-            # Maintain FPS
-            elapsed = time.time() - start_time
-            sleep_time = max(0, interval - elapsed)
-            time.sleep(sleep_time)
+            # Maintain FPS on an absolute monotonic schedule; stop() interrupts the wait
+            next_frame += interval
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                if self._stop_event.wait(delay):
+                    break
+            else:
+                next_frame = time.monotonic()  # fell behind: don't burst to catch up
+
+    def _decode(self, data):
+        """Decode a JPEG to BGR at the current downscale factor."""
+        if _TURBOJPEG is not None:
+            return _TURBOJPEG.decode(data, pixel_format=TJPF_BGR,
+                                     scaling_factor=(1, self._decode_scale))
+        # np.frombuffer wraps the bytes, no copy
+        return cv2.imdecode(np.frombuffer(data, np.uint8), _CV2_DECODE_FLAGS[self._decode_scale])
+
+    def _choose_decode_scale(self, src_width, src_height):
+        """Decode later frames at the smallest JPEG scale still >= the target size.
+
+        The Kachaka API has no camera resolution setting, so shrinking has to
+        happen here; scaling in the decoder skips most of the IDCT and leaves
+        cv2.resize a much smaller image (or nothing) to process.
+        """
+        for factor in _DECODE_SCALES:
+            if src_width // factor >= self.width and src_height // factor >= self.height:
+                self._decode_scale = factor
+                logger.info(f"Decoding {src_width}x{src_height} camera frames at 1/{factor} scale")
+                return
+
+    def _encode_loop(self):
+        """Encoder thread: write queued frames until the stop sentinel arrives."""
+        stopping = False
+        wrote_any = False
+        while not stopping:
+            batch = [self._frames.get()]
+            # Take whatever else is already queued so it goes out in one writev
+            while True:
+                try:
+                    batch.append(self._frames.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                stopping = True  # sentinel: write what came before it, then exit
+                batch.pop()
+            if not batch:
+                continue
+            try:
+                self._write_batch(batch)
+                wrote_any = True
+            except Exception as e:
+                if wrote_any:
+                    logger.error(f"Error writing frame: {e}")
+                    continue
+                # Failed on the very first frame (e.g. ffmpeg exited at startup):
+                # the writer never worked, so switch to the next codec
+                logger.error(f"Video writer failed on first frame ({e}), trying next codec")
+                self._fall_back_writer(batch)
+                wrote_any = self.writer is not None
+
+    def _write_batch(self, batch):
+        if self.writer is None:
+            return
+        if len(batch) > 1 and hasattr(self.writer, "write_many"):
+            self.writer.write_many(batch)
+        else:
+            for frame_bgr in batch:
+                self.writer.write(frame_bgr)
+
+    def _fall_back_writer(self, batch):
+        """Replace a writer that failed before writing anything, then retry batch."""
+        failed, self.writer = self.writer, None
+        failed.release()
+        while True:
+            self.writer = self._open_next_writer()
+            if self.writer is None:
+                logger.error(f"No working video writer for {self.output_path}, frames are discarded")
+                return
+            try:
+                self._write_batch(batch)
+                return
+            except Exception as e:
+                logger.error(f"Video writer failed on first frame ({e}), trying next codec")
+                self.writer.release()